@@ -0,0 +1,40 @@
+# Generated by Django 5.1.3 on 2026-08-30 04:04
+
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    """Populates path/depth for existing rows by resolving ancestor chains in memory."""
+    Item = apps.get_model('fms_app', 'Item')
+    items = {item.pk: item for item in Item.objects.only('id', 'name', 'parent_id')}
+    for item in items.values():
+        parts = [item.name]
+        parent_id = item.parent_id
+        while parent_id:
+            parent = items[parent_id]
+            parts.append(parent.name)
+            parent_id = parent.parent_id
+        item.path = '/'.join(reversed(parts))
+        item.depth = len(parts) - 1
+    Item.objects.bulk_update(items.values(), ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='depth',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='path',
+            field=models.TextField(blank=True, db_index=True, default=''),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
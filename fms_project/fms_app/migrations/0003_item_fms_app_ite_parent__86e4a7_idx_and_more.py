@@ -0,0 +1,21 @@
+# Generated by Django 5.1.3 on 2026-08-30 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_app', '0002_item_depth_item_path'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['parent', 'name', 'type'], name='fms_app_ite_parent__86e4a7_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='item',
+            constraint=models.UniqueConstraint(fields=('parent', 'name', 'type'), name='uniq_parent_name_type'),
+        ),
+    ]
@@ -1,7 +1,15 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 from django.conf import settings
 import os
 from django.core.exceptions import ValidationError
+from django.utils.functional import cached_property
+
+# Bound once at import: settings.MEDIA_ROOT goes through LazySettings'
+# __getattr__ on every access, which adds up when thousands of items
+# resolve paths in a single list view.
+_MEDIA_ROOT = str(settings.MEDIA_ROOT)
 
 class Item(models.Model):
     FILE = 'file'
@@ -16,20 +24,74 @@ class Item(models.Model):
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='subitems')
     file = models.FileField(upload_to='files/', null=True, blank=True)  # Used for files only
     file_path = models.TextField(null=True, blank=True)
+    path = models.TextField(db_index=True, blank=True, default='')  # Materialized path relative to MEDIA_ROOT, e.g. 'docs/reports/q1.pdf'
+    depth = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['parent', 'name', 'type']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['parent', 'name', 'type'], name='uniq_parent_name_type'),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Keeps the denormalized `path`/`depth` columns in sync and, on rename or move,
+        rewrites all descendant paths with a single bulk UPDATE instead of per-row saves.
+        """
+        old_path = None
+        old_depth = 0
+        if self.pk:
+            old = Item.objects.filter(pk=self.pk).values('path', 'depth').first()
+            if old:
+                old_path = old['path']
+                old_depth = old['depth']
+        if self.parent:
+            self.path = f"{self.parent.path}/{self.name}"
+            self.depth = self.parent.depth + 1
+        else:
+            self.path = self.name
+            self.depth = 0
+        self.__dict__.pop('full_path', None)  # path may have changed; drop the cached value
+        super().save(*args, **kwargs)
+        if old_path and old_path != self.path:
+            old_prefix = f"{old_path}/"
+            Item.objects.filter(path__startswith=old_prefix).update(
+                path=Concat(Value(f"{self.path}/"), Substr('path', len(old_prefix) + 1)),
+                depth=F('depth') + (self.depth - old_depth),
+            )
+
+    @classmethod
+    def descendant_ids(cls, root_id):
+        """
+        Returns the ids of the given item and all of its descendants, resolved
+        with a single recursive query instead of one query per tree level.
+        """
+        table = cls._meta.db_table
+        sql = (
+            f"WITH RECURSIVE descendants AS ("
+            f" SELECT id FROM {table} WHERE id = %s"
+            f" UNION ALL"
+            f" SELECT i.id FROM {table} i JOIN descendants d ON i.parent_id = d.id"
+            f") SELECT id FROM descendants"
+        )
+        return [row.id for row in cls.objects.raw(sql, [root_id])]
+
+    @cached_property
+    def full_path(self):
+        """Absolute filesystem path for this item, computed once per instance."""
+        path = self.path or (f"{self.parent.path}/{self.name}" if self.parent else self.name)
+        return os.path.join(_MEDIA_ROOT, path)
+
     def get_full_path(self):
         """Returns the full item path in the filesystem, including parent folders."""
-        path_parts = [self.name]
-        parent = self.parent
-        while parent:
-            path_parts.append(parent.name)
-            parent = parent.parent
-        return os.path.join(settings.MEDIA_ROOT, *reversed(path_parts))
+        return self.full_path
 
     def is_folder(self):
         """Returns True if this item is a folder, otherwise False."""
@@ -41,15 +103,9 @@ class Item(models.Model):
 
     def clean(self):
         """
-        Custom validation for files and folders.
-        Ensures that files have valid parent folders and prevents invalid parent-child relationships.
+        Custom validation for files and folders. Name uniqueness within a folder
+        is enforced by the DB unique constraint, not a SELECT-before-INSERT.
         """
-        if self.type == self.FILE:
-            if self.parent and not self.parent.is_folder():
-                raise ValidationError("Files must have a valid folder as their parent.")
-            if self.parent and self.parent.subitems.filter(name=self.name, type=self.FILE).exclude(id=self.id).exists():
-                raise ValidationError("A file with this name already exists in the parent folder.")
-        elif self.type == self.FOLDER:
-            if self.parent and self.parent.subitems.filter(name=self.name, type=self.FOLDER).exclude(id=self.id).exists():
-                raise ValidationError("A folder with this name already exists in the parent folder.")
+        if self.type == self.FILE and self.parent and not self.parent.is_folder():
+            raise ValidationError("Files must have a valid folder as their parent.")
         super().clean()
@@ -0,0 +1,17 @@
+from rest_framework import renderers
+import orjson
+
+class ORJSONRenderer(renderers.BaseRenderer):
+    """
+    JSON renderer backed by orjson, which serializes typical dict/datetime
+    payloads several times faster than the stdlib json module used by DRF's
+    default JSONRenderer.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data)
@@ -1,7 +1,31 @@
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
 from .models import Item
 
 class ItemSerializer(serializers.ModelSerializer):
+    # Annotated in ItemViewSet.get_queryset; the DB counts children in the
+    # same query instead of Python iterating subitems per row.
+    child_count = serializers.IntegerField(read_only=True, default=0)
+
     class Meta:
         model = Item
-        fields = ['id', 'name', 'type', 'parent', 'file', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'type', 'parent', 'file', 'created_at', 'updated_at', 'child_count']
+        # Suppress the UniqueTogetherValidator DRF derives from the model's
+        # unique constraint: it would force parent to be required (breaking
+        # root items) and re-add a per-request uniqueness SELECT. Duplicates
+        # are left to the DB constraint and surface as IntegrityError -> 409.
+        validators = []
+
+    def validate(self, attrs):
+        """Runs model-level validation before the row is written, so invalid items never hit the DB."""
+        item = Item(**attrs)
+        if self.instance is not None:
+            item.id = self.instance.id
+            for field in ('name', 'type', 'parent'):
+                if field not in attrs:
+                    setattr(item, field, getattr(self.instance, field))
+        try:
+            item.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return attrs
@@ -3,19 +3,61 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import Item
 from .serializers import ItemSerializer
-from django.core.files.storage import FileSystemStorage
-from django.db import transaction
+from .tasks import move_tree, remove_tree
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Value
+from django.db.models.functions import Concat, Substr
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.core.exceptions import ValidationError
+import fcntl
+import orjson
 import os
-from pathlib import Path
+import re
 from rest_framework.decorators import action
 import shutil
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import APIException
+from rest_framework.pagination import CursorPagination
 
-class ItemPagination(PageNumberPagination):
+def _rename_or_revert(item_id, old_path, new_path, old_name):
+    """
+    Post-commit rename with a compensating update: the row is already
+    committed when this runs, so if the filesystem rename fails the name is
+    put back (save() recomputes path and descendant paths) to keep the DB
+    matching what is actually on disk.
+    """
+    try:
+        os.rename(old_path, new_path)
+    except OSError:
+        item = Item.objects.filter(id=item_id).first()
+        if item is not None:
+            item.name = old_name
+            item.save()
+
+
+def _suffix(name):
+    """Returns the file extension including the dot, without pathlib's parsing overhead."""
+    i = name.rfind('.')
+    return name[i:] if i > 0 else ''
+
+
+class Conflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "An item with this name already exists in the parent folder."
+
+
+class ItemPagination(CursorPagination):
+    """
+    Keyset pagination: each page is one index range scan, with none of the
+    COUNT(*) queries PageNumberPagination runs per request. The tradeoff is
+    that responses carry next/previous cursors instead of a total count.
+    """
     page_size = 10
     max_page_size = 100
     limit_query_param = 'limit'
+    ordering = ('name', 'id')
 
     def get_page_size(self, request):
         limit = request.query_params.get(self.limit_query_param, None)
@@ -36,27 +78,46 @@ class ItemViewSet(viewsets.ModelViewSet):
     ordering_fields = ['name', 'created_at', 'updated_at']
     ordering = ['name']
 
+    # Concrete model columns the list endpoints project; child_count is
+    # annotated, not read from a column.
+    list_fields = ('id', 'name', 'type', 'parent', 'file', 'created_at', 'updated_at')
+
+    def get_queryset(self):
+        """
+        Joins the parent FK up front so serialization does not lazy-load it per
+        row, projects only the serializer's fields so wide columns such as
+        file_path never cross the DB socket, and counts children in the same
+        query so the serializer never iterates subitems in Python.
+        """
+        return (
+            Item.objects.select_related('parent')
+            .only(*self.list_fields)
+            .annotate(child_count=Count('subitems'))
+            .order_by('name')
+        )
+
     @transaction.atomic
     def perform_create(self, serializer):
         """
-            Creation of an item folder. Validates the item and creates the necessary folder structure.
+            Creation of an item folder. Validation runs in the serializer, so a
+            single INSERT writes the row with its final paths.
         """
-        item = serializer.save()
+        item_type = serializer.validated_data.get('type')
+        parent = serializer.validated_data.get('parent')
+        uploaded_file = serializer.validated_data.get('file')
+        save_kwargs = {}
+        if item_type == Item.FILE:
+            if not (parent and parent.is_folder()):
+                raise ValidationError("Files must have a valid folder as parent.")
+            if uploaded_file:
+                parent_folder_path = parent.full_path
+                save_kwargs['file_path'] = os.path.join(parent_folder_path, uploaded_file.name)
         try:
-            item.clean()
-        except ValidationError as e:
-            raise Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        item_path = item.get_full_path()
+            item = serializer.save(**save_kwargs)
+        except IntegrityError:
+            raise Conflict()
         if item.is_folder():
-            os.makedirs(item_path, exist_ok=True)
-        else:
-            if item.parent and item.parent.is_folder():
-                parent_folder_path = item.parent.get_full_path()
-                if item.file:
-                    item.file.name = os.path.join(parent_folder_path, item.file.name)
-                    item.save()
-            else:
-                raise ValidationError("Files must have a valid folder as parent.")
+            os.makedirs(item.full_path, exist_ok=True)
 
     @transaction.atomic
     def perform_update(self, serializer):
@@ -64,28 +125,40 @@ class ItemViewSet(viewsets.ModelViewSet):
             Updating an item, ensuring changes to file paths or folder paths are properly applied in the filesystem.
         """
         item = self.get_object()
-        old_item_path = item.get_full_path()
+        old_item_path = item.full_path
         old_name = item.name
         item_type = item.type
-        updated_item = serializer.save()
+        try:
+            updated_item = serializer.save()
+        except IntegrityError:
+            raise Conflict()
         try:
             if item_type == Item.FILE:
-                old_extension = Path(old_name).suffix
+                old_extension = _suffix(old_name)
                 new_name = updated_item.name
-                new_extension = Path(new_name).suffix
+                new_extension = _suffix(new_name)
                 if not new_extension:
                     new_name = f"{new_name}{old_extension}"
                     updated_item.name = new_name
                     updated_item.save()
-                new_item_path = updated_item.get_full_path()
+                new_item_path = updated_item.full_path
                 if os.path.exists(old_item_path):
-                    os.rename(old_item_path, new_item_path)
+                    # Rename after commit so a slow filesystem does not hold the
+                    # transaction open; on failure the row is reverted to the
+                    # old name instead of diverging from the disk.
+                    transaction.on_commit(
+                        lambda pk=updated_item.id, old=old_item_path, new=new_item_path, name=old_name:
+                        _rename_or_revert(pk, old, new, name)
+                    )
                 else:
                     raise ValidationError(f"Old file path does not exist: {old_item_path}")
             elif item_type == Item.FOLDER:
-                new_item_path = updated_item.get_full_path()
+                new_item_path = updated_item.full_path
                 if old_item_path != new_item_path and os.path.exists(old_item_path):
-                    os.rename(old_item_path, new_item_path)
+                    transaction.on_commit(
+                        lambda pk=updated_item.id, old=old_item_path, new=new_item_path, name=old_name:
+                        _rename_or_revert(pk, old, new, name)
+                    )
         except Exception as e:
             raise ValidationError(f"Error renaming or updating item: {e}")
         return updated_item
@@ -112,16 +185,37 @@ class ItemViewSet(viewsets.ModelViewSet):
             if not file_extension:
                 return Response({"error": "Uploaded file must have a valid extension."}, status=status.HTTP_400_BAD_REQUEST)
             full_file_name = f"{file_name}{file_extension}"
-            folder_path = parent_item.get_full_path()
+            folder_path = parent_item.full_path
             os.makedirs(folder_path, exist_ok=True)
-            fs = FileSystemStorage(location=folder_path)
-            saved_filename = fs.save(full_file_name, uploaded_file)
+            dest_path = os.path.join(folder_path, full_file_name)
+            # O_EXCL makes the create atomic: concurrent uploads of the same
+            # name fail fast instead of silently overwriting each other.
+            try:
+                dst_fd = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+            except FileExistsError:
+                return Response({"error": "A file with the same name already exists in the destination folder."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            with os.fdopen(dst_fd, 'wb') as dst:
+                if hasattr(uploaded_file, 'temporary_file_path'):
+                    # Large uploads already sit on disk; copy them kernel-side
+                    # instead of chunking through Python.
+                    with open(uploaded_file.temporary_file_path(), 'rb') as src:
+                        offset = 0
+                        while offset < uploaded_file.size:
+                            sent = os.sendfile(dst.fileno(), src.fileno(), offset, uploaded_file.size - offset)
+                            if sent == 0:
+                                break
+                            offset += sent
+                else:
+                    shutil.copyfileobj(uploaded_file, dst, 1 << 20)
             file_item = Item.objects.create(
                 name=full_file_name,
                 type=Item.FILE,
                 parent=parent_item,
-                file = uploaded_file,
-                file_path=os.path.join('files', parent_item.get_full_path(), saved_filename)
+                # FileField names must be MEDIA_ROOT-relative for the
+                # serialized URL to resolve under MEDIA_URL.
+                file=os.path.relpath(dest_path, settings.MEDIA_ROOT),
+                file_path=dest_path,
             )
             return Response(
                 {
@@ -132,6 +226,103 @@ class ItemViewSet(viewsets.ModelViewSet):
             )
         except Item.DoesNotExist:
             return Response({"error": "Parent folder not found."}, status=status.HTTP_404_NOT_FOUND)
+        except IntegrityError:
+            return Response({"error": Conflict.default_detail}, status=status.HTTP_409_CONFLICT)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @transaction.atomic
+    @action(detail=False, methods=['post'], url_path='bulk-create')
+    def bulk_create(self, request):
+        """
+            Create many items in one request, e.g. for subtree imports. All rows
+            are validated together and written with a single batched INSERT
+            instead of one INSERT per item; rows that duplicate an existing
+            item are skipped via the unique constraint rather than per-row
+            existence checks, and still count toward the processed total.
+        """
+        serializer = ItemSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        items = [Item(**attrs) for attrs in serializer.validated_data]
+        # bulk_create bypasses save(), so materialize path/depth here. Parents
+        # must already exist; rows cannot reference other rows in the batch.
+        for item in items:
+            if item.parent:
+                item.path = f"{item.parent.path}/{item.name}"
+                item.depth = item.parent.depth + 1
+            else:
+                item.path = item.name
+                item.depth = 0
+        created = Item.objects.bulk_create(items, batch_size=500, ignore_conflicts=True)
+        for item in created:
+            if item.is_folder():
+                os.makedirs(item.full_path, exist_ok=True)
+        return Response({"message": f"{len(created)} items processed."}, status=status.HTTP_201_CREATED)
+
+    @transaction.atomic
+    @action(detail=False, methods=['post'], url_path='upload-chunk')
+    def upload_chunk(self, request):
+        """
+            Upload one chunk of a file, addressed by a 'Content-Range: bytes start-end/total'
+            header. Chunks are written into a '.part' file at their offset, so uploads use
+            bounded memory, can run in parallel, and can resume after a network error.
+            The Item row is created when the final chunk arrives.
+        """
+        parent_id = request.data.get('parent_id')
+        file_name = request.data.get('name')
+        chunk = request.FILES.get('file')
+        content_range = request.META.get('HTTP_CONTENT_RANGE')
+        if not parent_id or not file_name:
+            return Response({"error": "'parent_id' and 'name' are required."}, status=status.HTTP_400_BAD_REQUEST)
+        if not chunk:
+            return Response({"error": "No chunk uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+        match = re.fullmatch(r'bytes (\d+)-(\d+)/(\d+)', content_range or '')
+        if not match:
+            return Response({"error": "A 'Content-Range: bytes start-end/total' header is required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        start, end, total = map(int, match.groups())
+        try:
+            parent_item = Item.objects.get(id=parent_id)
+            if parent_item.type != Item.FOLDER:
+                return Response({"error": "The parent ID must refer to a folder."}, status=status.HTTP_400_BAD_REQUEST)
+            file_extension = os.path.splitext(chunk.name)[1]
+            if not file_extension:
+                return Response({"error": "Uploaded file must have a valid extension."}, status=status.HTTP_400_BAD_REQUEST)
+            full_file_name = f"{file_name}{file_extension}"
+            folder_path = parent_item.full_path
+            os.makedirs(folder_path, exist_ok=True)
+            final_path = os.path.join(folder_path, full_file_name)
+            part_path = f"{final_path}.part"
+            # O_CREAT without O_TRUNC so chunks from parallel requests can land
+            # at their own offsets in the same file; flock serializes writers
+            # touching the same .part file.
+            with os.fdopen(os.open(part_path, os.O_WRONLY | os.O_CREAT), 'wb') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(start)
+                for piece in chunk.chunks(1 << 20):
+                    f.write(piece)
+            if end + 1 >= total:
+                os.rename(part_path, final_path)
+                file_item = Item.objects.create(
+                    name=full_file_name,
+                    type=Item.FILE,
+                    parent=parent_item,
+                    file=os.path.relpath(final_path, settings.MEDIA_ROOT),
+                    file_path=final_path,
+                )
+                return Response(
+                    {
+                        "message": "File uploaded successfully.",
+                        "file_path": file_item.file_path,
+                    },
+                    status=status.HTTP_201_CREATED,
+                )
+            return Response({"message": "Chunk received.", "received": end + 1, "total": total},
+                            status=status.HTTP_200_OK)
+        except Item.DoesNotExist:
+            return Response({"error": "Parent folder not found."}, status=status.HTTP_404_NOT_FOUND)
+        except IntegrityError:
+            return Response({"error": Conflict.default_detail}, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -151,33 +342,57 @@ class ItemViewSet(viewsets.ModelViewSet):
             if new_parent.type != Item.FOLDER:
                 return Response({"error": "The new parent must be a folder."}, status=status.HTTP_400_BAD_REQUEST)
             if item.type == Item.FILE:
-                old_item_path = item.get_full_path()
-                new_item_path = os.path.join(new_parent.get_full_path(), item.name)
-                if os.path.exists(new_item_path):
-                    return Response({"error": "A file with the same name already exists in the destination folder."}, 
+                old_item_path = item.full_path
+                new_item_path = os.path.join(new_parent.full_path, item.name)
+                # Atomic move-if-absent: link then unlink instead of
+                # exists-then-move, which races with concurrent requests.
+                try:
+                    os.link(old_item_path, new_item_path)
+                except FileExistsError:
+                    return Response({"error": "A file with the same name already exists in the destination folder."},
                                     status=status.HTTP_400_BAD_REQUEST)
-                if not os.path.exists(old_item_path):
+                except FileNotFoundError:
                     return Response({"error": "The source file does not exist."}, status=status.HTTP_404_NOT_FOUND)
                 item.parent = new_parent
                 item.file_path = os.path.join('files', new_item_path)  # Update the path in the database
-                item.save()
-                shutil.move(old_item_path, new_item_path)
+                try:
+                    item.save()
+                except Exception:
+                    # Undo the link so the file exists only at the source,
+                    # matching the row the rollback restores.
+                    os.unlink(new_item_path)
+                    raise
+                os.unlink(old_item_path)
             elif item.type == Item.FOLDER:
-                old_folder_path = item.get_full_path()
-                new_folder_path = os.path.join(new_parent.get_full_path(), item.name)
+                old_folder_path = item.full_path
+                new_folder_path = os.path.join(new_parent.full_path, item.name)
                 if os.path.exists(new_folder_path):
                     return Response({"error": "A folder with the same name already exists in the destination folder."}, 
                                     status=status.HTTP_400_BAD_REQUEST)
                 if not os.path.exists(old_folder_path):
                     return Response({"error": "The source folder does not exist."}, status=status.HTTP_404_NOT_FOUND)
-                shutil.move(old_folder_path, new_folder_path)
                 item.parent = new_parent
                 item.save()
+                # Rewrite file_path for every file under the moved folder in one
+                # UPDATE instead of loading and saving each descendant row. The
+                # prefix is separator-terminated and replaced positionally so a
+                # sibling like 'bc' is untouched when 'b' moves.
+                old_prefix = old_folder_path + os.sep
+                new_prefix = new_folder_path + os.sep
+                Item.objects.filter(file_path__startswith=old_prefix).update(
+                    file_path=Concat(Value(new_prefix), Substr('file_path', len(old_prefix) + 1))
+                )
+                # Move the tree after commit so DB row locks are not held for the
+                # duration of the filesystem copy.
+                transaction.on_commit(lambda: move_tree(old_folder_path, new_folder_path))
+                return Response({"message": "Folder move scheduled."}, status=status.HTTP_202_ACCEPTED)
             else:
                 return Response({"error": "Item must be either a file or a folder."}, status=status.HTTP_400_BAD_REQUEST)
             return Response({"message": "Item moved successfully."}, status=status.HTTP_200_OK)
         except Item.DoesNotExist:
             return Response({"error": "Item or new parent folder not found."}, status=status.HTTP_404_NOT_FOUND)
+        except IntegrityError:
+            return Response({"error": Conflict.default_detail}, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -192,17 +407,22 @@ class ItemViewSet(viewsets.ModelViewSet):
             return Response({"error": "'id' is required."}, status=status.HTTP_400_BAD_REQUEST)
         try:
             item_queryset = Item.objects.get(id=item_id)
-            item_path = item_queryset.get_full_path()
+            item_path = item_queryset.full_path
             if item_queryset.type == Item.FOLDER:
-                shutil.rmtree(item_path)
-                Item.objects.filter(parent=item_queryset).delete()
-                item_queryset.delete()
+                # One recursive query for the whole subtree, then one DELETE,
+                # instead of cascading level by level. The filesystem tree is
+                # removed after commit so the transaction stays short.
+                descendant_ids = Item.descendant_ids(item_queryset.id)
+                Item.objects.filter(id__in=descendant_ids).delete()
+                transaction.on_commit(lambda: remove_tree(item_path))
             elif item_queryset.type == Item.FILE:
-                if os.path.exists(item_path):
-                    Item.objects.filter(id=item_queryset.id).delete()
+                # Remove directly and catch the miss rather than racing an
+                # exists() check against concurrent deletes.
+                try:
                     os.remove(item_path)
-                else:
+                except FileNotFoundError:
                     return Response({"error": "File not found"}, status=status.HTTP_404_NOT_FOUND)
+                Item.objects.filter(id=item_queryset.id).delete()
             return Response({"message": "Folder and its contents deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
         except Item.DoesNotExist:
             return Response({"error": "Item not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -219,20 +439,59 @@ class ItemViewSet(viewsets.ModelViewSet):
             pk = request.query_params.get('id', None)
             search_term = request.query_params.get('search', None)
             ordering_param = request.query_params.get('ordering', None)
+            recursive = request.query_params.get('recursive') in ('1', 'true')
             if pk:
                 folder = Item.objects.filter(id=pk, type=Item.FOLDER).first()
                 if not folder:
                     return Response({"error": "Folder not found or invalid folder id."}, status=status.HTTP_404_NOT_FOUND)
-                queryset = Item.objects.filter(parent_id=pk)
+                if recursive:
+                    # Whole subtree in one index range scan on the materialized
+                    # path, instead of the client issuing one call per level.
+                    queryset = self.get_queryset().filter(path__startswith=f"{folder.path}/")
+                else:
+                    queryset = self.get_queryset().filter(parent_id=pk)
             else:
-                queryset = Item.objects.all()
+                queryset = self.get_queryset()
             if search_term:
                 queryset = queryset.filter(name__icontains=search_term)
-            if ordering_param:
-                queryset = queryset.order_by(ordering_param)
+            # One aggregate answers unchanged-content requests with 304,
+            # skipping pagination and serialization entirely. The row count is
+            # folded into the ETag because deletions lower it without touching
+            # MAX(updated_at).
+            etag = None
+            last_modified = None
+            agg = queryset.aggregate(latest=Max('updated_at'), total=Count('id'))
+            latest = agg['latest']
+            if latest is not None:
+                last_modified = int(latest.timestamp())
+                etag = quote_etag(f"{latest.timestamp()}-{agg['total']}")
+                conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if conditional is not None:
+                    return conditional
+            if request.query_params.get('stream') in ('1', 'true'):
+                # Stream the whole (unpaginated) result set, serializing one
+                # row at a time so peak memory stays flat for huge folders.
+                def render_rows(qs):
+                    yield b'['
+                    first = True
+                    for obj in qs.iterator(chunk_size=1000):
+                        if not first:
+                            yield b','
+                        first = False
+                        yield orjson.dumps(ItemSerializer(obj).data)
+                    yield b']'
+                return StreamingHttpResponse(render_rows(queryset), content_type='application/json')
             paginator = ItemPagination()
+            if ordering_param:
+                # Cursor pagination owns the ordering; id breaks ties so the
+                # keyset stays unique.
+                paginator.ordering = (ordering_param, 'id')
             paginated_items = paginator.paginate_queryset(queryset, request)
             serializer = ItemSerializer(paginated_items, many=True)
-            return paginator.get_paginated_response(serializer.data)
+            response = paginator.get_paginated_response(serializer.data)
+            if etag is not None:
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(last_modified)
+            return response
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)